@@ -1,10 +1,9 @@
+import numpy as np
 import pandas as pd
 
-# read space‑delimited file (no header)
-df = pd.read_csv('data/facebook_combined.txt',
-                 sep='\s+',      # one or more spaces/tabs
-                 header=None,    # no existing header row
-                 names=['Source','Target'])
+# read space‑delimited file (no header); np.loadtxt goes through the C parser and yields int32 directly
+edges = np.loadtxt('data/facebook_combined.txt', dtype=np.int32, ndmin=2)
+df = pd.DataFrame(edges, columns=['Source','Target'])
 
 # write out as CSV (with header)
 df.to_csv('data/facebook_combined.csv', index=False)
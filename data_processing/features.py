@@ -1,16 +1,15 @@
 import os
+import numpy as np
 import pandas as pd
 
 def list_ego_ids(directory):
     """
     Scans `directory` for files named like <ego_id>.* and returns
-    a sorted list of unique ego_ids.
+    a sorted list of unique ego_ids. Uses os.scandir, whose entries carry
+    the file type from the directory listing (no extra stat per file).
     """
-    ego_ids = set()
-    for fname in os.listdir(directory):
-        if '.' in fname:
-            ego_id, _ = fname.split('.', 1)
-            ego_ids.add(ego_id)
+    with os.scandir(directory) as entries:
+        ego_ids = {entry.name.split('.', 1)[0] for entry in entries if '.' in entry.name and entry.is_file()}
     return sorted(ego_ids)
 
 def parse_featnames(path):
@@ -59,61 +58,61 @@ def parse_feat_file(feat_path, feature_mapping):
     - Otherwise ('.feat'), we expect each line as:
           node_id b1 b2 b3 ... bN
 
-    Returns a list of dicts:
-      [{ 'node_id': …, feat_name1: val or None, … }, …]
+    Returns a tuple (node_ids, bits, cols):
+      - node_ids: int array with one entry per node (row)
+      - bits: uint8 array of shape (len(node_ids), len(cols)), one byte per feature
+      - cols: sorted list of column indices from the mapping, one per column of bits
     """
-    rows = []
     # sorted list of column indices from the mapping
     cols = sorted(feature_mapping.keys())
-    feature_names = [feature_mapping[c][0] for c in cols]
 
-    is_ego_file = feat_path.endswith('.egofeat')
-    if is_ego_file:
-        # extract node_id from filename, e.g. '0.egofeat' → '0'
-        node_id = os.path.basename(feat_path).split('.', 1)[0]
+    # Parse the whole file in C: one row per line, whitespace-separated integers
+    arr = np.loadtxt(feat_path, dtype=np.int64, ndmin=2)
 
-    with open(feat_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            parts = line.strip().split()
-            if not parts:
-                continue
-
-            if is_ego_file:
-                bits = parts
-            else:
-                # regular .feat: first token is node_id
-                node_id, bits = parts[0], parts[1:]
+    if feat_path.endswith('.egofeat'):
+        # extract node_id from filename, e.g. '0.egofeat' → '0'; each line is just the bit-vector
+        node_id = int(os.path.basename(feat_path).split('.', 1)[0])
+        node_ids = np.full(arr.shape[0], node_id, dtype=np.int64)
+        bits = arr
+    else:
+        # regular .feat: first column is node_id
+        node_ids, bits = arr[:, 0], arr[:, 1:]
 
-            if len(bits) < len(cols):
-                raise ValueError(f"Too few bits ({len(bits)}) for expected {len(cols)} cols in {feat_path!r}")
+    if bits.shape[1] < len(cols):
+        raise ValueError(f"Too few bits ({bits.shape[1]}) for expected {len(cols)} cols in {feat_path!r}")
 
-            # build the row
-            row = {'node_id': int(node_id)}
-            for idx, col in enumerate(cols):
-                bit = bits[idx]
-                feat_name, feat_val = feature_mapping[col]
-                row[feat_name] = feat_val if bit == '1' else None
+    return node_ids, (bits[:, :len(cols)] == 1).astype(np.uint8), cols
 
-            rows.append(row)
+def feature_values(bits, cols, feature_mapping):
+    """
+    Turns the bit matrix of one parsed .feat/.egofeat file into one column of values per feature:
+    feat_val where the bit is set, None otherwise. When several columns share a feature name,
+    the last of them determines the value.
 
-    return rows
+    Returns a dict: feature_name → object array with one value per row of bits
+    """
+    last_col = {}
+    for idx, col in enumerate(cols):
+        last_col[feature_mapping[col][0]] = idx
+    return {
+        feat_name: np.where(bits[:, idx] == 1, feature_mapping[cols[idx]][1], None)
+        for feat_name, idx in last_col.items()
+    }
 
 def combine_to_csv(results, output_csv_path):
     """
-    - results: list of dicts like [{'node_id': '698', 'birthday': None, …}, …]
+    - results: dict of equal-length columns like {'node_id': array([698, …]), 'birthday': array([None, …]), …}
     - output_csv_path: where to write the combined CSV
-    - fill_with_none: if True, replaces pandas NaN with Python None before saving
     """
-    # Create DataFrame (missing keys → NaN)
+    # Create DataFrame straight from the dense columns (None/NaN are written as empty CSV cells)
     df = pd.DataFrame(results)
 
-    df = df.where(pd.notnull(df), None)
-
     # Sort by node_id    
     df.sort_values(by='node_id', inplace=True)
 
-    # suppose df is your DataFrame with duplicates
-    df = df.groupby('node_id', as_index=False).first()
+    # Merge the rows of nodes that appear in several ego networks (first non-null value per
+    # column); the keys are already sorted, so skip groupby's own sort
+    df = df.groupby('node_id', as_index=False, sort=False).first()
 
     # Write to CSV; index=False so node_id is a column, not the index
     df.to_csv(output_csv_path, index=False)
@@ -125,15 +124,29 @@ def extract_features_to_csv(data_dir, output_csv):
     """
     Extracts features for all ego_ids.
     """
-    feature_list = []
+    node_ids = []
+    pieces = {}  # feature_name → list of (first row, values) of every file defining it
+    n_rows = 0
     e_ids = list_ego_ids(data_dir)
     for id in e_ids:
         features = parse_featnames(os.path.join(data_dir, f"{id}.featnames"))
         map = map_features(features)
-        feature_list = feature_list + parse_feat_file(os.path.join(data_dir, f"{id}.egofeat"), map)
-        feature_list = feature_list + parse_feat_file(os.path.join(data_dir, f"{id}.feat"), map)
+        for suffix in ("egofeat", "feat"):
+            ids, bits, cols = parse_feat_file(os.path.join(data_dir, f"{id}.{suffix}"), map)
+            for feat_name, values in feature_values(bits, cols, map).items():
+                pieces.setdefault(feat_name, []).append((n_rows, values))
+            node_ids.append(ids)
+            n_rows += ids.size
+
+    # Assemble one dense column per feature (None for nodes of egos without that feature)
+    columns = {'node_id': np.concatenate(node_ids)}
+    for feat_name, feat_pieces in pieces.items():
+        column = np.full(n_rows, None, dtype=object)
+        for start, values in feat_pieces:
+            column[start:start + values.size] = values
+        columns[feat_name] = column
     
-    return combine_to_csv(feature_list, output_csv)
+    return combine_to_csv(columns, output_csv)
     
 
 if __name__ == "__main__":
@@ -1,9 +1,14 @@
+import argparse
 import re
 from pathlib import Path
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
 
+parser = argparse.ArgumentParser(description="Plot the simulation log and write the final splits CSV.")
+parser.add_argument('--full', action='store_true', help="print every row of the final splits instead of a preview")
+args = parser.parse_args()
+
 # 1) Point to your raw log file here:
 file_path = Path('output/output.txt')
 if not file_path.exists():
@@ -18,57 +23,50 @@ content = file_path.read_text()
 # 3) Parse function: finds each “Running … p=…” header, then its iteration lines
 def parse_results(content: str):
     data = []
+    # A single pass over the whole log with one combined pattern.
     # Header lines look like: 
     #   Running facebook with evolutionary_game_round, imitate_best_neighbor, initial coinflip p=0.25
-    header_pattern = re.compile(
-        r"Running ([^ ]+) with ([^,]+), ([^,]+), initial ([^ ]+) p=(0\.\d+)"
-    )
     # Iteration lines look like:
     #   Iteration 0 Strategy Distribution: 25.67% cooperators, 74.33% defectors
-    iteration_pattern = re.compile(
-        r"Iteration (\d+) Strategy Distribution: ([\d\.]+)% cooperators, ([\d\.]+)% defectors"
+    line_pattern = re.compile(
+        r"^(?:Running (?P<dataset>[^ \n]+) with (?P<game>[^,\n]+), (?P<update_rule>[^,\n]+), initial (?P<init>[^ \n]+) p=(?P<p>0\.\d+)"
+        r"|Iteration (?P<iteration>\d+) Strategy Distribution: (?P<coop>[\d\.]+)% cooperators, (?P<defe>[\d\.]+)% defectors)",
+        re.MULTILINE
     )
     
     current = {}
-    for line in content.splitlines():
-        header_match = header_pattern.match(line)
-        if header_match:
-            dataset, game, update_rule, init, p = header_match.groups()
+    for match in line_pattern.finditer(content):
+        if match.group("dataset") is not None:
             current = {
-                "dataset": dataset,
-                "game": game,
-                "update_rule": update_rule,
-                "p": float(p),
+                "dataset": match.group("dataset"),
+                "game": match.group("game"),
+                "update_rule": match.group("update_rule"),
+                "p": float(match.group("p")),
                 "iterations": {}
             }
             data.append(current)
-        else:
-            iter_match = iteration_pattern.match(line)
-            if iter_match and current:
-                iteration, coop_pct, defe_pct = iter_match.groups()
-                current["iterations"][int(iteration)] = {
-                    "cooperators": float(coop_pct),
-                    "defectors": float(defe_pct)
-                }
+        elif current:
+            current["iterations"][int(match.group("iteration"))] = {
+                "cooperators": float(match.group("coop")),
+                "defectors": float(match.group("defe"))
+            }
     return data
 
 parsed_data = parse_results(content)
 
-# 4) Build a single DataFrame from the parsed data (for plotting)
-records = []
+# 4) Build a single DataFrame from the parsed data (for plotting), one column at a time
+columns = {name: [] for name in ["dataset", "game", "update_rule", "p", "iteration", "cooperators", "defectors"]}
 for entry in parsed_data:
     for iteration, values in entry["iterations"].items():
-        records.append({
-            "dataset": entry["dataset"],
-            "game": entry["game"],
-            "update_rule": entry["update_rule"],
-            "p": entry["p"],
-            "iteration": iteration,
-            "cooperators": values["cooperators"],
-            "defectors": values["defectors"]
-        })
-
-df = pd.DataFrame(records)
+        columns["dataset"].append(entry["dataset"])
+        columns["game"].append(entry["game"])
+        columns["update_rule"].append(entry["update_rule"])
+        columns["p"].append(entry["p"])
+        columns["iteration"].append(iteration)
+        columns["cooperators"].append(values["cooperators"])
+        columns["defectors"].append(values["defectors"])
+
+df = pd.DataFrame(columns)
 
 # 5) Create a 'plots/' directory (if not already present)
 plots_dir = Path('Project Template for ECE227/figures/plots/')
@@ -148,6 +146,9 @@ final_df = pd.DataFrame(final_records)
 final_csv_path = 'output/final_splits.csv'
 final_df.to_csv(final_csv_path, index=False)
 
-# 8) Display the final splits (including convergence iteration)
-pd.set_option('display.max_rows', None)
-print(final_df)
+# 8) Display the final splits (including convergence iteration); the CSV above is the real output
+if args.full:
+    print(final_df.to_string())
+else:
+    print(final_df.head())
+    print(f"{final_df.shape[0]} rows x {final_df.shape[1]} columns (full table in {final_csv_path}, or pass --full)")
@@ -2,86 +2,124 @@ from typing import Callable, Dict, List, Tuple
 import networkx as nx
 import numpy as np
 import matplotlib.pyplot as plt
-from collections import Counter
 
-from utils.load_dataset import load_epinions
+from utils.load_graph import load_graph
 from src.strategies.initial_state import coin_flip_initializer, assign_strategies
 from src.strategies.update_rule import imitate_best_neighbor, trust_aware_update, fermi_update, all_neighbors_trust_aware_update
-from src.game.game_play import evolutionary_game_round, game_round_trust
+from src.strategies.simulator import run_sync, count_cooperators, unpack_history
+from src.game.game_play import evolutionary_game_round, game_round_trust, play_prisoners_dilemma, play_with_trust_and_pd
+from utils.graph_csr import CompiledGraph, to_networkx
 
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import os
 
 
+def run_config(
+    cg: CompiledGraph,
+    dataset: str,
+    game_type: Callable,
+    update_rule: Callable,
+    p: float,
+    seed: int,
+    output_path: str,
+    num_iterations: int = 20,
+    save_interval: int = 10
+) -> str:
+    """
+    Run one simulation configuration from a fresh coin-flip initialization and write its GEXF
+    snapshots, strategy history and cooperator-fraction plot to output_path. Safe to run in a worker process: cg
+    arrives as a private copy, and the log is returned instead of printed so that concurrent
+    runs do not interleave their output.
+
+    Args:
+        cg (CompiledGraph) : The compiled graph of the dataset.
+        dataset (str) : Name of the dataset, used in the log and the snapshot filenames.
+        game_type (Callable) : evolutionary_game_round or game_round_trust.
+        update_rule (Callable) : The strategy update rule.
+        p (float) : Initial probability of cooperating.
+        seed (int) : Seed of the initialization; round i is played with seed + i.
+        output_path (str) : Directory the snapshots and the plot are written to.
+        num_iterations (int) : Number of rounds to play (default: 20).
+        save_interval (int) : Save a snapshot every save_interval rounds (default: 10).
+
+    Returns:
+        str : The log of the run, in the format parsed by report_images.py.
+    """
+    log = ["-" * 100, f"Running {dataset} with {game_type.__name__}, {update_rule.__name__}, initial coinflip p={p}"]
+
+    # The topology is compiled once per dataset; only the strategies are re-initialized per run
+    assign_strategies(cg, coin_flip_initializer, p=p, seed=seed)
+
+    # Play all rounds at once; history holds the bit-packed strategies of every node after every round
+    if game_type == evolutionary_game_round:
+        payoff_fn = play_prisoners_dilemma
+    elif game_type == game_round_trust:
+        payoff_fn = partial(play_with_trust_and_pd, flip_prob=0.7)
+    history = run_sync(cg, num_iterations, payoff_fn, update_rule, seed=seed)
+
+    # Record fraction of cooperators; cooperators are the set bits of every packed row
+    total_count = cg.strategy.size
+    coops = count_cooperators(history).tolist()
+    cooperator_fractions = [coop / total_count for coop in coops]
+
+    os.makedirs(output_path, exist_ok=True)
+
+    for i, coop in enumerate(coops):
+        total = f", Total: {total_count}" if i == 0 else ""
+        log.append(f"Iteration {i} Strategy Distribution: {coop/total_count:.2%} cooperators, {(total_count-coop)/total_count:.2%} defectors{total}")
+
+        # Save the graph for Gephi (strategies only, gzip-compressed)
+        if i % save_interval == 0 or i == num_iterations:
+            nx.write_gexf(to_networkx(cg, with_signs=False, strategy=unpack_history(history[i], total_count)), f"{output_path}/{dataset}_iter_{i}.gexf.gz")
+
+    np.save(f"{output_path}/{dataset}_strategies.npy", history)
+
+    # Plot the results
+    plt.plot(range(num_iterations+1), cooperator_fractions)
+    plt.xlabel("Iteration")
+    plt.ylabel("Fraction of Cooperators")
+    plt.title("Evolution of Cooperation")
+    # plt.show()
+    # Save the plot
+    plt.savefig(f"{output_path}/cooperator_fractions.png")
+    plt.close()
+
+    return "\n".join(log)
+
 
 if __name__ == "__main__":
     data = ['facebook', 'epinion']
 
     num_iterations = 20
-    cooperator_fractions = []
-    save_interval = 10  # Save every 5 iterations
+    save_interval = 10  # Save every 10 iterations
     prob = [0.25, 0.5, 0.75]
+    max_workers = os.cpu_count()  # Every configuration runs in its own worker process
 
 
     for dataset in data:
         if dataset == 'facebook':
-            G = nx.read_edgelist('data/facebook_combined.txt', nodetype=int)
+            cg = load_graph('data/facebook_combined.txt', directed=False, cache_path='data/facebook.npz')  # Cached as compiled CSR arrays
             game_types= [evolutionary_game_round]  # Only use evolutionary game for Facebook
             update_rules = [imitate_best_neighbor, fermi_update]  # Use only these two update rules for Facebook
         elif dataset == 'epinion':
-            G = load_epinions('data/epinion/soc-sign-epinions.txt', directed=True)
+            cg = load_graph('data/epinion/soc-sign-epinions.txt', directed=True, cache_path='data/epinions.npz')  # Signed edge list straight to CSR
             game_types = [evolutionary_game_round, game_round_trust]  # Use both games for Epinions
             update_rules = [imitate_best_neighbor, fermi_update, trust_aware_update, all_neighbors_trust_aware_update]  # Use all four update rules for Epinions
 
 
-        for game_type in game_types:
-            for update_rule in update_rules:
-                for p in prob:
-                    print("-" * 100)
-                    print(f"Running {dataset} with {game_type.__name__}, {update_rule.__name__}, initial coinflip p={p}")
-                    cooperator_fractions = []  # Reset for each game type and update rule
-
-                    # Initialize the graph with strategies
-                    graph = G.copy()  # Use a copy of the graph for each game type and update rule
-
-                    # Initialize strategies once at the start
-                    assign_strategies(graph, coin_flip_initializer, p=p, seed=42)
-                    # Record initial fraction of cooperators
-                    strategies = nx.get_node_attributes(graph, "strategy")
-                    strategy_counts = Counter(strategies.values())
-                    total_count = len(strategies)
-                    cooperator_fractions.append(strategy_counts[1] / total_count)
-                    
-                    output_path = f"output/{dataset}/{game_type.__name__}/{update_rule.__name__}/p_{p:.2f}"
-                    os.makedirs(output_path, exist_ok=True)
-
-                    print(f"Iteration 0 Strategy Distribution: {strategy_counts[1]/total_count:.2%} cooperators, {strategy_counts[0]/total_count:.2%} defectors, Total: {total_count}")
-                    nx.write_gexf(graph, f"{output_path}/{dataset}_iter_0.gexf")
-
-
-                    for i in range(num_iterations):
-                        # Play one round and update strategies
-                        if game_type == evolutionary_game_round:
-                            evolutionary_game_round(graph, update_rule, seed=42+i)
-                        elif game_type == game_round_trust:
-                            game_round_trust(graph, update_rule, flip_prob=0.7, seed=42+i)
-
-                        # Record fraction of cooperators
-                        strategies = nx.get_node_attributes(graph, "strategy")
-                        strategy_counts = Counter(strategies.values())
-                        cooperator_fractions.append(strategy_counts[1] / total_count)
-                        print(f"Iteration {i+1} Strategy Distribution: {strategy_counts[1]/total_count:.2%} cooperators, {strategy_counts[0]/total_count:.2%} defectors")
-
-                        # Save the graph for Gephi
-                        if (i+1) % save_interval == 0 or i == num_iterations - 1:
-                            nx.write_gexf(graph, f"{output_path}/{data}_iter_{i+1}.gexf")
-
-                    # Plot the results
-                    plt.plot(range(num_iterations+1), cooperator_fractions)
-                    plt.xlabel("Iteration")
-                    plt.ylabel("Fraction of Cooperators")
-                    plt.title("Evolution of Cooperation")
-                    # plt.show()
-                    # Save the plot
-                    plt.savefig(f"{output_path}/cooperator_fractions.png")
-                    plt.close()
-
+        # Every configuration is independent: farm them out to worker processes, each of which gets
+        # its own copy of the compiled arrays, and print the logs in submission order
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    run_config, cg, dataset, game_type, update_rule, p, 42,
+                    f"output/{dataset}/{game_type.__name__}/{update_rule.__name__}/p_{p:.2f}",
+                    num_iterations, save_interval
+                )
+                for game_type in game_types
+                for update_rule in update_rules
+                for p in prob
+            ]
+            for future in futures:
+                print(future.result(), flush=True)
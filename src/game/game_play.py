@@ -1,9 +1,10 @@
-from typing import Callable, Dict, List, Tuple
-import networkx as nx
+from typing import Callable, List
 import numpy as np
 
 from src.strategies.initial_state import coin_flip_initializer, assign_strategies, Initializer
 from src.strategies.update_rule import imitate_best_neighbor, update_strategies, UpdateRule
+from utils.graph_csr import CompiledGraph
+from utils.jit import njit
 
 PAYOFF_MATRIX = {
     (1, 1): (3, 3),  # Both cooperate
@@ -12,89 +13,104 @@ PAYOFF_MATRIX = {
     (0, 0): (1, 1),  # Both defect
 }
 
+# PAYOFF_MATRIX as two 2x2 lookup tables, payoff of u and payoff of v, both indexed by
+# [strategy_u, strategy_v] (0 = Defect, 1 = Cooperate); built once at import
+PAYOFF_U = np.array([[PAYOFF_MATRIX[(su, sv)][0] for sv in (0, 1)] for su in (0, 1)], dtype=np.int8)  # [[1, 5], [0, 3]]
+PAYOFF_V = np.array([[PAYOFF_MATRIX[(su, sv)][1] for sv in (0, 1)] for su in (0, 1)], dtype=np.int8)  # [[1, 0], [5, 3]]
+
 def play_prisoners_dilemma(
-    G: nx.Graph,
+    cg: CompiledGraph,
     seed: int = None
-) -> Dict[Tuple[int, int], Tuple[int, int]]:
+) -> np.ndarray:
     """
-    Plays the Prisoner's Dilemma game between all pairs of nodes in the graph and 
-    returns the results of the game.
+    Plays the Prisoner's Dilemma game between all pairs of neighboring nodes in the graph and 
+    returns the accumulated payoff of every node.
+
+    The games are evaluated on whole edge arrays at once: the strategies of both endpoints are
+    gathered from the contiguous strategy array, looked up in the payoff tables and summed per node
+    with np.bincount.
 
     Args:
-        G (nx.Graph) : The graph whose nodes will play the game.
+        cg (CompiledGraph) : The compiled graph whose nodes will play the game.
         seed (int) : Seed for random number generator for reproducibility.
 
     Returns:
-        Dict[Tuple[int, int], Tuple[int, int]]: A dictionary mapping each pair of node IDs
-                                                 to the outcome of their game (payoff for node 1, payoff for node 2).
+        np.ndarray: Accumulated payoff of each node, indexed by compact node index.
     """
-    rng = np.random.default_rng(seed)
-    game_results = {}
-
-    # Iterate over all pairs of nodes in the graph
-    for u in G.nodes():
-        for v in G.neighbors(u):
-            if u < v:  # to ensure each pair is only played once (no duplication)
-                strategy_u = G.nodes[u].get("strategy")
-                strategy_v = G.nodes[v].get("strategy")
-                
-                # Get payoffs from the payoff matrix
-                payoff_u, payoff_v = PAYOFF_MATRIX[(strategy_u, strategy_v)]
-                
-                # Store the result of the game
-                game_results[(u, v)] = (payoff_u, payoff_v)
-    
-    return game_results
+    su = cg.strategy[cg.edges_u]
+    sv = cg.strategy[cg.edges_v]
+
+    # Per-edge payoffs go straight into the per-node accumulation
+    N = cg.strategy.size
+    payoffs = np.bincount(cg.edges_u, weights=PAYOFF_U[su, sv], minlength=N)
+    payoffs += np.bincount(cg.edges_v, weights=PAYOFF_V[su, sv], minlength=N)
+    return payoffs
+
+@njit(cache=True)
+def _trust_round(
+    edges_u: np.ndarray,
+    edges_v: np.ndarray,
+    target_u: np.ndarray,
+    target_v: np.ndarray,
+    strategy: np.ndarray,
+    payoffs: np.ndarray,
+    P_u: np.ndarray,
+    P_v: np.ndarray
+) -> None:
+    """
+    Sequential trust-flip + PD loop over the game pairs, updating strategy and payoffs in place.
+    target_u[e] / target_v[e] is the strategy u / v flips to on pair e, or -1 to keep it.
+    """
+    for e in range(edges_u.size):
+        u = edges_u[e]
+        v = edges_v[e]
+
+        # --- 1) trust-based updates (u’s turn, then v’s turn) ---
+        if target_u[e] >= 0:
+            strategy[u] = target_u[e]
+        if target_v[e] >= 0:
+            strategy[v] = target_v[e]
+
+        # --- 2) play PD with updated strategies and 3) accumulate payoffs ---
+        su = strategy[u]
+        sv = strategy[v]
+        payoffs[u] += P_u[su, sv]
+        payoffs[v] += P_v[su, sv]
 
 def play_with_trust_and_pd(
-    G: nx.DiGraph,
+    cg: CompiledGraph,
     flip_prob: float = 0.7,
     seed: int = None
-) -> Dict[int, float]:
+) -> np.ndarray:
     """
     For each undirected edge {u,v}:
       1) u and v possibly flip strategy based on trust(u->v) & trust(v->u)
       2) play PD with their new strategies
       3) accumulate and return payoffs[node]
+    The flipped strategies are written back to cg.strategy. The random numbers for the
+    trust flips are drawn up front so the compiled loop stays deterministic for a given seed.
+
+    Whether and to what each endpoint flips on each pair is decided for all pairs at once with
+    boolean masks. The flips themselves are still applied in pair order, since a node's strategy
+    on a pair depends on the flips of its earlier pairs in the same round.
     """
     rng = np.random.default_rng(seed)
-    payoffs = {n: 0.0 for n in G.nodes()}
-
-    for u in G.nodes():
-        for v in G.neighbors(u):
-            if u >= v:
-                continue
-
-            # --- 1) trust-based updates ---
-            # u’s turn
-            sign_uv = G.edges[u, v].get('sign', 0)
-            if sign_uv ==  1 and rng.random() < flip_prob:
-                G.nodes[u]['strategy'] = 1
-            elif sign_uv == -1 and rng.random() < flip_prob:
-                G.nodes[u]['strategy'] = 0
-
-            # v’s turn (if reverse edge exists)
-            if G.has_edge(v, u):
-                sign_vu = G.edges[v, u].get('sign', 0)
-                if sign_vu ==  1 and rng.random() < flip_prob:
-                    G.nodes[v]['strategy'] = 1
-                elif sign_vu == -1 and rng.random() < flip_prob:
-                    G.nodes[v]['strategy'] = 0
-
-            # --- 2) play PD with updated strategies ---
-            su = G.nodes[u]['strategy']
-            sv = G.nodes[v]['strategy']
-            pu, pv = PAYOFF_MATRIX[(su, sv)]
-
-            # --- 3) accumulate payoffs ---
-            payoffs[u] += pu
-            payoffs[v] += pv
 
+    # All trust-flip coins in a single draw: row 0 for u's turn, row 1 for v's turn
+    flip_u, flip_v = rng.random((2, cg.edges_u.size)) < flip_prob
+
+    # Trust (+1) flips to cooperate, distrust (-1) to defect; -1 keeps the current strategy
+    # (no flip, no edge or unsigned edge)
+    target_u = np.where(flip_u & (cg.sign_uv != 0), cg.sign_uv > 0, -1).astype(np.int8)
+    target_v = np.where(flip_v & (cg.sign_vu != 0), cg.sign_vu > 0, -1).astype(np.int8)
+
+    payoffs = np.zeros(cg.strategy.size)
+    _trust_round(cg.edges_u, cg.edges_v, target_u, target_v, cg.strategy, payoffs, PAYOFF_U, PAYOFF_V)
     return payoffs
        
 
 def game_round_trust(
-    G: nx.DiGraph,
+    cg: CompiledGraph,
     update_rule: UpdateRule = imitate_best_neighbor,
     flip_prob: float = 0.7,
     seed: int = None
@@ -105,16 +121,16 @@ def game_round_trust(
     1. Playing the Prisoner's Dilemma game with trust dependent game dynamics.
     2. Updating strategies based on the game outcomes and chosen update rule.
     Args:
-        G (nx.DiGraph) : The directed graph to run the evolutionary game on.
+        cg (CompiledGraph) : The compiled directed graph to run the evolutionary game on.
         update_rule (UpdateRule) : The function used to update the strategies based on the payoffs.
         flip_prob (float) : Probability of flipping strategy based on trust edges.
         seed (int) : Seed for random number generation for reproducibility (default: None).
     """
-    payoffs = play_with_trust_and_pd(G, flip_prob=flip_prob, seed=seed)
-    update_strategies(G, payoffs, update_rule, seed=seed)
+    payoffs = play_with_trust_and_pd(cg, flip_prob=flip_prob, seed=seed)
+    update_strategies(cg, payoffs, update_rule, seed=seed)
 
 def evolutionary_game_round(
-    G: nx.Graph,
+    cg: CompiledGraph,
     update_rule: UpdateRule,
     seed: int = None
 ) -> None:
@@ -124,25 +140,20 @@ def evolutionary_game_round(
     2. Updating strategies based on the game outcomes and chosen update rule.
 
     Args:
-        G (nx.Graph) : The network graph to run the evolutionary game on.
+        cg (CompiledGraph) : The compiled network graph to run the evolutionary game on.
         update_rule (UpdateRule) : The function used to update the strategies based on the payoffs.
         seed (int) : Seed for random number generation for reproducibility (default: None).
     """
 
     # Step 1: Play the Prisoner's Dilemma game with each pair of neighbors
-    game_results = play_prisoners_dilemma(G, seed)
-    
-    # Step 2: Calculate accumulated payoffs for each node
-    payoffs = {node: 0.0 for node in G.nodes()}
-    
-    for (u, v), (payoff_u, payoff_v) in game_results.items():
-        payoffs[u] += payoff_u
-        payoffs[v] += payoff_v
-
-    # Step 3: Update the strategies based on the payoffs
-    update_strategies(G, payoffs, update_rule, seed)
+    payoffs = play_prisoners_dilemma(cg, seed)
+
+    # Step 2: Update the strategies based on the payoffs
+    update_strategies(cg, payoffs, update_rule, seed)
 
 # Example usage
 # G = nx.read_edgelist('data/facebook_combined.txt', nodetype=int)
-# evolutionary_game_round(G, coin_flip_initializer, imitate_best_neighbor, seed=42)
-# print("Updated strategies:", nx.get_node_attributes(G, "strategy"))
\ No newline at end of file
+# cg = to_csr(G)
+# assign_strategies(cg, coin_flip_initializer, seed=42)
+# evolutionary_game_round(cg, imitate_best_neighbor, seed=42)
+# print("Updated strategies:", cg.strategy)
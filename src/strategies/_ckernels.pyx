@@ -0,0 +1,159 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True, initializedcheck=False
+'''
+Ahead-of-time compiled (Cython) versions of the kernels in _kernels.py, for environments without
+numba or that cannot afford its JIT warm-up. Every function has the same name, signature and
+random-number inputs as its kernel and gives identical results. Build it in place with
+    cythonize -i src/strategies/_ckernels.pyx
+after which the update rules accept backend="cython".
+'''
+from libc.math cimport tanh
+from libc.stdint cimport int8_t, int32_t, uint8_t
+
+
+def imitate_best_kernel(
+    const int32_t[::1] indptr,
+    const int32_t[::1] indices,
+    const int8_t[::1] strategy,
+    const double[::1] payoffs,
+    const uint8_t[::1] tie_coins,
+    int8_t[::1] out
+):
+    """
+    Imitate-best-neighbor over the CSR adjacency. tie_coins[e] is the 0/1 coin of CSR entry e:
+    a neighbor tying the best payoff so far replaces it if its coin is 1.
+    """
+    cdef Py_ssize_t u, e, v, best
+    cdef double p, best_pay
+    with nogil:
+        for u in range(strategy.shape[0]):
+            best = u
+            best_pay = payoffs[u]
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                p = payoffs[v]
+                if p > best_pay:
+                    best = v
+                    best_pay = p
+                elif p == best_pay and tie_coins[e] == 1:
+                    best = v
+            out[u] = strategy[best]
+
+
+def trust_aware_kernel(
+    const int32_t[::1] indptr,
+    const int32_t[::1] indices,
+    const int8_t[::1] signs,
+    const int8_t[::1] strategy,
+    const double[::1] payoffs,
+    const double[::1] tie_u01,
+    int8_t[::1] out
+):
+    """
+    Trust-aware update over the CSR adjacency. The candidates of u are u itself (sign +1) and
+    its neighbors, compared by sign * payoff; tie_u01[u] picks uniformly among the best ones.
+    """
+    cdef Py_ssize_t u, e, lo, hi, v_star, n_best, k
+    cdef int8_t sign_uv
+    cdef double eff, max_eff
+    with nogil:
+        for u in range(strategy.shape[0]):
+            lo, hi = indptr[u], indptr[u + 1]
+
+            # 1) best effective payoff, its first candidate and the number of candidates reaching it
+            max_eff = payoffs[u]
+            v_star, sign_uv = u, 1
+            n_best = 1
+            for e in range(lo, hi):
+                eff = signs[e] * payoffs[indices[e]]
+                if eff > max_eff:
+                    max_eff = eff
+                    v_star, sign_uv = indices[e], signs[e]
+                    n_best = 1
+                elif eff == max_eff:
+                    n_best += 1
+
+            # 2) on a tie, walk the candidates again to the randomly chosen best one (unless it is the first)
+            k = min(<Py_ssize_t>(tie_u01[u] * n_best), n_best - 1)
+            if k > 0:
+                if payoffs[u] == max_eff:
+                    k -= 1  # u itself is the first best candidate
+                for e in range(lo, hi):
+                    if signs[e] * payoffs[indices[e]] == max_eff:
+                        if k == 0:
+                            v_star, sign_uv = indices[e], signs[e]
+                            break
+                        k -= 1
+
+            # 3) keep, copy or oppose the chosen candidate's strategy
+            if v_star == u:
+                out[u] = strategy[u]
+            elif sign_uv == 1:
+                out[u] = strategy[v_star]
+            else:
+                out[u] = 1 - strategy[v_star]
+
+
+def fermi_kernel(
+    const int32_t[::1] indptr,
+    const int32_t[::1] indices,
+    const int8_t[::1] strategy,
+    const double[::1] payoffs,
+    const double[::1] pick_u01,
+    const double[::1] accept_u01,
+    double K,
+    int8_t[::1] out
+):
+    """
+    Fermi update over the CSR adjacency. pick_u01[u] selects the random neighbor v of u, and
+    u adopts v's strategy if accept_u01[u] falls below the Fermi probability.
+    """
+    cdef Py_ssize_t u, lo, deg, v
+    cdef double x, prob
+    with nogil:
+        for u in range(strategy.shape[0]):
+            lo = indptr[u]
+            deg = indptr[u + 1] - lo
+            if deg == 0:
+                # No neighbors: keep current strategy
+                out[u] = strategy[u]
+                continue
+
+            v = indices[lo + min(<Py_ssize_t>(pick_u01[u] * deg), deg - 1)]
+
+            # Same tanh form of the logistic as the other backends
+            x = (payoffs[v] - payoffs[u]) / K
+            prob = 0.5 + 0.5 * tanh(0.5 * x)
+
+            out[u] = strategy[v] if accept_u01[u] < prob else strategy[u]
+
+
+def all_neighbors_trust_kernel(
+    const int32_t[::1] indptr,
+    const int32_t[::1] indices,
+    const int8_t[::1] signs,
+    const int8_t[::1] strategy,
+    const double[::1] payoffs,
+    const uint8_t[::1] keep_coins,
+    int8_t[::1] out
+):
+    """
+    All-neighbors trust-aware update over the CSR adjacency: the sign of u's own payoff plus the
+    signed sum of its neighbors' payoffs decides; on a zero sum, u keeps its strategy if its
+    0/1 coin keep_coins[u] is 1 and flips it otherwise.
+    """
+    cdef Py_ssize_t u, e
+    cdef double neighbor_sum, weighted_payoff_sum
+    with nogil:
+        for u in range(strategy.shape[0]):
+            # Neighbors first, then u itself, the same summation order as the sparse product
+            neighbor_sum = 0.0
+            for e in range(indptr[u], indptr[u + 1]):
+                neighbor_sum += signs[e] * payoffs[indices[e]]
+            weighted_payoff_sum = payoffs[u] + neighbor_sum
+
+            if weighted_payoff_sum > 0:
+                out[u] = 1
+            elif weighted_payoff_sum < 0:
+                out[u] = 0
+            else:
+                out[u] = strategy[u] if keep_coins[u] == 1 else 1 - strategy[u]
@@ -0,0 +1,150 @@
+'''
+Compiled inner loops of the strategy update rules in update_rule.py.
+Every kernel walks the CSR arrays of a CompiledGraph node by node and writes the new strategy of
+every node into out. The random numbers are drawn in bulk by the callers and passed in, so the
+kernels are deterministic for a given seed and give identical results with or without numba.
+'''
+import math
+import numpy as np
+
+from utils.jit import njit
+
+
+@njit(cache=True)
+def imitate_best_kernel(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    strategy: np.ndarray,
+    payoffs: np.ndarray,
+    tie_coins: np.ndarray,
+    out: np.ndarray
+) -> None:
+    """
+    Imitate-best-neighbor over the CSR adjacency. tie_coins[e] is the 0/1 coin of CSR entry e:
+    a neighbor tying the best payoff so far replaces it if its coin is 1.
+    """
+    for u in range(strategy.size):
+        best = u
+        best_pay = payoffs[u]
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            p = payoffs[v]
+            if p > best_pay:
+                best = v
+                best_pay = p
+            elif p == best_pay and tie_coins[e] == 1:
+                best = v
+        out[u] = strategy[best]
+
+
+@njit(cache=True)
+def trust_aware_kernel(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    signs: np.ndarray,
+    strategy: np.ndarray,
+    payoffs: np.ndarray,
+    tie_u01: np.ndarray,
+    out: np.ndarray
+) -> None:
+    """
+    Trust-aware update over the CSR adjacency. The candidates of u are u itself (sign +1) and
+    its neighbors, compared by sign * payoff; tie_u01[u] picks uniformly among the best ones.
+    """
+    for u in range(strategy.size):
+        lo, hi = indptr[u], indptr[u + 1]
+
+        # 1) best effective payoff, its first candidate and the number of candidates reaching it
+        max_eff = payoffs[u]
+        v_star, sign_uv = u, 1
+        n_best = 1
+        for e in range(lo, hi):
+            eff = signs[e] * payoffs[indices[e]]
+            if eff > max_eff:
+                max_eff = eff
+                v_star, sign_uv = indices[e], signs[e]
+                n_best = 1
+            elif eff == max_eff:
+                n_best += 1
+
+        # 2) on a tie, walk the candidates again to the randomly chosen best one (unless it is the first)
+        k = min(int(tie_u01[u] * n_best), n_best - 1)
+        if k > 0:
+            if payoffs[u] == max_eff:
+                k -= 1  # u itself is the first best candidate
+            for e in range(lo, hi):
+                if signs[e] * payoffs[indices[e]] == max_eff:
+                    if k == 0:
+                        v_star, sign_uv = indices[e], signs[e]
+                        break
+                    k -= 1
+
+        # 3) keep, copy or oppose the chosen candidate's strategy
+        if v_star == u:
+            out[u] = strategy[u]
+        elif sign_uv == 1:
+            out[u] = strategy[v_star]
+        else:
+            out[u] = 1 - strategy[v_star]
+
+
+@njit(cache=True)
+def fermi_kernel(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    strategy: np.ndarray,
+    payoffs: np.ndarray,
+    pick_u01: np.ndarray,
+    accept_u01: np.ndarray,
+    K: float,
+    out: np.ndarray
+) -> None:
+    """
+    Fermi update over the CSR adjacency. pick_u01[u] selects the random neighbor v of u, and
+    u adopts v's strategy if accept_u01[u] falls below the Fermi probability.
+    """
+    for u in range(strategy.size):
+        lo = indptr[u]
+        deg = indptr[u + 1] - lo
+        if deg == 0:
+            # No neighbors: keep current strategy
+            out[u] = strategy[u]
+            continue
+
+        v = indices[lo + min(int(pick_u01[u] * deg), deg - 1)]
+
+        # Logistic written with tanh: branchless, cannot overflow, and the same formula as the NumPy version
+        x = (payoffs[v] - payoffs[u]) / K
+        prob = 0.5 + 0.5 * math.tanh(0.5 * x)
+
+        out[u] = strategy[v] if accept_u01[u] < prob else strategy[u]
+
+
+@njit(cache=True)
+def all_neighbors_trust_kernel(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    signs: np.ndarray,
+    strategy: np.ndarray,
+    payoffs: np.ndarray,
+    keep_coins: np.ndarray,
+    out: np.ndarray
+) -> None:
+    """
+    All-neighbors trust-aware update over the CSR adjacency: the sign of u's own payoff plus the
+    signed sum of its neighbors' payoffs decides; on a zero sum, u keeps its strategy if its
+    0/1 coin keep_coins[u] is 1 and flips it otherwise.
+    """
+    for u in range(strategy.size):
+        # Neighbors first, then u itself, the same summation order as the sparse product
+        neighbor_sum = 0.0
+        for e in range(indptr[u], indptr[u + 1]):
+            neighbor_sum += signs[e] * payoffs[indices[e]]
+        weighted_payoff_sum = payoffs[u] + neighbor_sum
+
+        if weighted_payoff_sum > 0:
+            out[u] = 1
+        elif weighted_payoff_sum < 0:
+            out[u] = 0
+        else:
+            out[u] = strategy[u] if keep_coins[u] == 1 else 1 - strategy[u]
@@ -0,0 +1,194 @@
+'''
+Whole-array NumPy versions of the kernels in _kernels.py, used when numba is not available.
+Every function has the same signature as its kernel and consumes the same pre-drawn random
+numbers, so both backends produce identical strategies for a given seed. Neighborhoods are
+processed as segments of the CSR arrays instead of one node at a time. Given CuPy arrays, the
+same functions run on the GPU (the "cuda" backend).
+'''
+import numpy as np
+
+from utils.gpu import get_array_module, get_sparse_module
+
+
+def _csr_rows(indptr: np.ndarray, xp) -> np.ndarray:
+    """
+    Row of every CSR entry.
+    """
+    N = indptr.size - 1
+    if xp is np:
+        return np.repeat(np.arange(N), np.diff(indptr))
+    # cupy.repeat only takes scalar repeat counts
+    return xp.searchsorted(indptr, xp.arange(int(indptr[-1])), side="right") - 1
+
+
+def _segment_first(mask: np.ndarray, rows: np.ndarray, N: int) -> np.ndarray:
+    """
+    First CSR entry of every row where mask is set, or -1 if there is none.
+    """
+    xp = get_array_module(mask)
+    hit = xp.flatnonzero(mask)
+    r = rows[hit]
+    # rows[hit] is sorted, so every run of equal rows starts at that row's first hit
+    start = xp.ones(hit.size, dtype=bool)
+    start[1:] = r[1:] != r[:-1]
+    first = xp.full(N, -1, dtype=np.intp)
+    first[r[start]] = hit[start]
+    return first
+
+
+def _segment_last(mask: np.ndarray, rows: np.ndarray, N: int) -> np.ndarray:
+    """
+    Last CSR entry of every row where mask is set, or -1 if there is none.
+    """
+    xp = get_array_module(mask)
+    hit = xp.flatnonzero(mask)
+    r = rows[hit]
+    end = xp.ones(hit.size, dtype=bool)
+    end[:-1] = r[1:] != r[:-1]
+    last = xp.full(N, -1, dtype=np.intp)
+    last[r[end]] = hit[end]
+    return last
+
+
+def _segment_max(values: np.ndarray, indptr: np.ndarray, initial: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """
+    Maximum of initial[u] and the CSR entries values[indptr[u]:indptr[u+1]] of every row u.
+    """
+    result = initial.copy()
+    xp = get_array_module(values)
+    if xp is not np:
+        # CuPy has no ufunc.reduceat; scatter the entries onto their rows with an atomic max instead
+        xp.maximum.at(result, rows, values)
+        return result
+    nonempty = indptr[1:] > indptr[:-1]
+    if values.size:
+        # Empty rows share their start with the next row, so dropping them keeps every segment intact
+        seg_max = np.maximum.reduceat(values, indptr[:-1][nonempty])
+        result[nonempty] = np.maximum(result[nonempty], seg_max)
+    return result
+
+
+def imitate_best_vectorized(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    strategy: np.ndarray,
+    payoffs: np.ndarray,
+    tie_coins: np.ndarray,
+    out: np.ndarray
+) -> None:
+    """
+    Imitate-best-neighbor as a segmented argmax. Scanning a neighborhood in order, the kernel ends
+    on the first candidate reaching the best payoff, unless a later tying neighbor won its coin;
+    then it ends on the last such neighbor.
+    """
+    xp = get_array_module(indptr)
+    N = strategy.size
+    rows = _csr_rows(indptr, xp)
+    edge_pay = payoffs[indices]
+    best_pay = _segment_max(edge_pay, indptr, payoffs, rows)
+
+    tied = edge_pay == best_pay[rows]
+    self_best = payoffs == best_pay
+    first_tied = _segment_first(tied, rows, N)
+
+    # Tying neighbors after the first best candidate that won their coin replace it
+    replaces = tied & (tie_coins == 1) & (self_best[rows] | (xp.arange(indices.size) > first_tied[rows]))
+    last_replace = _segment_last(replaces, rows, N)
+
+    best = xp.arange(N)
+    best[~self_best] = indices[first_tied[~self_best]]
+    replaced = last_replace >= 0
+    best[replaced] = indices[last_replace[replaced]]
+    out[:] = strategy[best]
+
+
+def trust_aware_vectorized(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    signs: np.ndarray,
+    strategy: np.ndarray,
+    payoffs: np.ndarray,
+    tie_u01: np.ndarray,
+    out: np.ndarray
+) -> None:
+    """
+    Trust-aware update as a segmented argmax over the effective payoffs sign * payoff, with u
+    itself as the first candidate of its segment. tie_u01 picks the same best candidate as in
+    the kernel, and the distrust flip 1 - s is applied as s XOR (sign < 0).
+    """
+    xp = get_array_module(indptr)
+    N = strategy.size
+    rows = _csr_rows(indptr, xp)
+    eff = signs * payoffs[indices]
+    max_eff = _segment_max(eff, indptr, payoffs, rows)
+
+    # Rank of every tying neighbor within its row, and number of best candidates per row
+    tied = eff == max_eff[rows]
+    tied_before = xp.zeros(indices.size + 1, dtype=np.intp)
+    xp.cumsum(tied, out=tied_before[1:])
+    rank = tied_before[:-1] - tied_before[indptr[:-1]][rows]
+    self_best = payoffs == max_eff
+    n_best = self_best + (tied_before[indptr[1:]] - tied_before[indptr[:-1]])
+
+    # Index of the chosen candidate among the best ones; u itself comes first if it is one of them
+    k = xp.minimum((tie_u01 * n_best).astype(np.intp), n_best - 1) - self_best
+    chosen = tied & (rank == k[rows])
+
+    v_star = xp.arange(N)
+    sign_uv = xp.ones(N, dtype=signs.dtype)
+    v_star[rows[chosen]] = indices[chosen]
+    sign_uv[rows[chosen]] = signs[chosen]
+    out[:] = xp.where(v_star == xp.arange(N), strategy, strategy[v_star] ^ (sign_uv < 0))
+
+def fermi_vectorized(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    strategy: np.ndarray,
+    payoffs: np.ndarray,
+    pick_u01: np.ndarray,
+    accept_u01: np.ndarray,
+    K: float,
+    out: np.ndarray
+) -> None:
+    """
+    Fermi update for all nodes at once: gather one random neighbor per node, evaluate the
+    logistic on the whole payoff-difference vector and adopt where the coin falls below it.
+    """
+    xp = get_array_module(indptr)
+    N = strategy.size
+    deg = xp.diff(indptr)
+    has_neighbors = deg > 0
+
+    # Isolated nodes "pick" themselves, so they keep their strategy whatever the coin says
+    v = xp.arange(N)
+    pick = xp.minimum((pick_u01[has_neighbors] * deg[has_neighbors]).astype(np.intp), deg[has_neighbors] - 1)
+    v[has_neighbors] = indices[indptr[:-1][has_neighbors] + pick]
+
+    x = (payoffs[v] - payoffs) / K
+    prob = 0.5 + 0.5 * xp.tanh(0.5 * x)
+    out[:] = xp.where(accept_u01 < prob, strategy[v], strategy)
+
+def all_neighbors_trust_vectorized(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    signs: np.ndarray,
+    strategy: np.ndarray,
+    payoffs: np.ndarray,
+    keep_coins: np.ndarray,
+    out: np.ndarray
+) -> None:
+    """
+    All-neighbors trust-aware update as one sparse matrix-vector product with the signed
+    adjacency matrix S: the weighted sums are payoffs + S @ payoffs.
+    """
+    xp = get_array_module(indptr)
+    N = strategy.size
+    # Wraps the CSR structure without copying it, so it is cheap to rebuild on every call; the signs
+    # take the payoff dtype, which the product upcasts to anyway (and cuSPARSE needs)
+    S = get_sparse_module(xp).csr_matrix((signs.astype(payoffs.dtype), indices, indptr), shape=(N, N))
+    weighted_payoff_sum = payoffs + S @ payoffs
+
+    keep = keep_coins == 1
+    out[:] = xp.where(weighted_payoff_sum > 0, 1,
+             xp.where(weighted_payoff_sum < 0, 0,
+             xp.where(keep, strategy, 1 - strategy)))
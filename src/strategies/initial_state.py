@@ -3,27 +3,28 @@ Module for flexible assignment of initial strategies to agents in a network.
 This abstraction allows plugging in different initialization schemes (e.g., random coin-flip,
 feature-based) without modifying the core assignment routine.
 '''
-from typing import Callable, Dict
-import networkx as nx
+from typing import Callable
 import numpy as np
 
+from utils.graph_csr import CompiledGraph
+
 # Type aliases for clarity
 Strategy = int  # 1 = Cooperate, 0 = Defect
-Initializer = Callable[[nx.Graph, np.random.Generator, float], Dict[int, Strategy]]
+Initializer = Callable[[CompiledGraph, np.random.Generator, float], np.ndarray]
 
 
 def assign_strategies(
-    G: nx.Graph,
+    cg: CompiledGraph,
     initializer: Initializer,
     p: float = 0.5,
     seed: int = None
 ) -> None:
     """
-    Assign a 'strategy' attribute to each node in the graph using a custom initializer.
+    Assign a strategy to each node of the compiled graph using a custom initializer.
 
     Args: 
-        G (nx.Graph) : The networkx graph whose nodes will receive strategy assignments.
-        initializer (Initializer) : A function taking (G, rng) and returning a dict mapping node IDs to strategies.
+        cg (CompiledGraph) : The compiled graph whose nodes will receive strategy assignments.
+        initializer (Initializer) : A function taking (cg, rng, p) and returning an int8 array with the strategy of every node.
         p (float) : Probability of assigning strategy=1 (Cooperate) to each node (default: 0.5).
         seed (int) : Seed for the random number generator for perfect reproducibility (default: None).
 
@@ -31,41 +32,40 @@ def assign_strategies(
         ValueError: If the initializer does not assign a strategy for every node.
     """
     rng = np.random.default_rng(seed)
-    strategy_map = initializer(G, rng, p)
+    strategies = initializer(cg, rng, p)
 
     # Ensure complete coverage
-    missing = set(G.nodes()) - set(strategy_map.keys())
-    if missing:
-        raise ValueError(f"Initializer did not assign strategies for nodes: {missing}")
+    if strategies.shape != cg.nodes.shape:
+        raise ValueError(f"Initializer assigned {strategies.size} strategies for {cg.nodes.size} nodes")
 
-    # Attach the computed strategies
-    nx.set_node_attributes(G, strategy_map, "strategy")
+    # Attach the computed strategies, writing into the existing int8 buffer
+    cg.strategy[:] = strategies
 
 
 def coin_flip_initializer(
-    G: nx.Graph,
+    cg: CompiledGraph,
     rng: np.random.Generator,
     p: float = 0.5
-) -> Dict[int, Strategy]:
+) -> np.ndarray:
     """
     Initialize strategies via independent Bernoulli trials (coin-flip).
     
     Args:
-        G (nx.Graph) : The graph whose nodes will be assigned strategies.
+        cg (CompiledGraph) : The compiled graph whose nodes will be assigned strategies.
         rng (np.random.Generator) : Numpy random generator for reproducibility.
         p (float) : Probability of assigning strategy=1 (Cooperate) to each node (default: 0.5).
 
     Returns:
-        Dict[int, Strategy] : Mapping from node ID to assigned strategy (0 - defect or 1 - cooperate).    
+        np.ndarray : int8 array with the strategy of every node (0 - defect or 1 - cooperate).    
     
     """
-    nodes = list(G.nodes())
-    samples = rng.random(len(nodes))
-
-    # Assign strategy based on the coin flip
-    return {node: int(samples[i] < p) for i, node in enumerate(nodes)}
+    # Assign strategy based on the coin flip: one vectorized comparison, with the draws handed out
+    # in original node order (cg.order) so that a seed gives every node the same strategy as before
+    strategies = np.empty(cg.nodes.size, dtype=np.int8)
+    strategies[cg.order] = rng.random(cg.nodes.size) < p
+    return strategies
 
 # Example usage
 # G = nx.read_edgelist('facebook_combined.txt', nodetype=int)
-# assign_strategies(G, coin_flip_initializer, seed=42)
-
+# cg = to_csr(G)
+# assign_strategies(cg, coin_flip_initializer, seed=42)
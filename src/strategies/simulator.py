@@ -0,0 +1,109 @@
+'''
+Module for running a whole synchronous simulation on a compiled graph in one call.
+Every round plays the game on the current strategies and writes the updated strategies into a
+second preallocated buffer; the two buffers are then swapped, so no strategy array is allocated
+or copied back per round. The strategy history is recorded bit-packed, 8 nodes per byte.
+'''
+from typing import Callable
+import inspect
+import numpy as np
+
+from utils.graph_csr import CompiledGraph
+from src.strategies.update_rule import UpdateRule
+
+# Type alias for clarity
+PayoffFunction = Callable[..., np.ndarray]  # (cg, seed=...) -> accumulated payoff of every node
+
+# Number of set bits of every byte value, the popcount lookup table of count_cooperators
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+def _accepts_out(update_rule: UpdateRule) -> bool:
+    """
+    Whether the update rule takes an out keyword to write the new strategies into, like the
+    rules in update_rule.py do.
+    """
+    try:
+        params = inspect.signature(update_rule).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(param.name == "out" or param.kind == param.VAR_KEYWORD for param in params)
+
+
+def count_cooperators(packed_history: np.ndarray) -> np.ndarray:
+    """
+    Number of cooperators in every row of a bit-packed strategy history (one popcount per byte).
+    """
+    return _POPCOUNT[packed_history].sum(axis=-1)
+
+
+def unpack_history(packed_history: np.ndarray, num_nodes: int) -> np.ndarray:
+    """
+    Unpack a bit-packed strategy history (or a single row of it) back into int8 strategies.
+    """
+    return np.unpackbits(packed_history, axis=-1, count=num_nodes).astype(np.int8)
+
+
+def run_sync(
+    cg: CompiledGraph,
+    num_iterations: int,
+    payoff_fn: PayoffFunction,
+    update_rule: UpdateRule,
+    seed: int = None,
+    backend: str = None
+) -> np.ndarray:
+    """
+    Run num_iterations synchronous rounds starting from the current strategies in cg.strategy.
+    Round i is seeded with seed + i exactly like evolutionary_game_round / game_round_trust,
+    so the run reproduces calling those once per round.
+
+    Args:
+        cg (CompiledGraph) : The compiled graph, with its initial strategies assigned.
+        num_iterations (int) : Number of rounds to play.
+        payoff_fn (PayoffFunction) : The game, e.g. play_prisoners_dilemma or
+                                     functools.partial(play_with_trust_and_pd, flip_prob=0.7).
+        update_rule (UpdateRule) : The strategy update rule. Rules that take an out keyword (like
+                                   those in update_rule.py) write into the spare buffer directly;
+                                   the result of any other rule is copied into it.
+        seed (int) : Seed of the first round (default: None, unseeded rounds).
+        backend (str) : Backend of the update rule, "numba", "cython", "numpy" or "cuda", passed on
+                        to the rule if given (default: None, the rule's own default).
+
+    Raises:
+        ValueError: If the update rule fails to return a new strategy for every node.
+
+    Returns:
+        np.ndarray : uint8 array of shape (num_iterations + 1, ceil(N / 8)) with the strategies
+                     after every round packed with np.packbits (row 0 holds the initial strategies);
+                     see count_cooperators and unpack_history. cg.strategy holds the last round.
+    """
+    history = np.empty((num_iterations + 1, (cg.strategy.size + 7) // 8), dtype=np.uint8)
+    history[0] = np.packbits(cg.strategy)
+
+    # Keywords the rule gets on every round; backend is left out if None, like update_strategies does
+    rule_kwargs = {} if backend is None else {"backend": backend}
+    accepts_out = _accepts_out(update_rule)
+
+    # Double buffering: the rule reads cg.strategy and writes spare, then the two swap roles
+    original = cg.strategy
+    spare = np.empty_like(original)
+    for i in range(num_iterations):
+        round_seed = None if seed is None else seed + i
+        payoffs = payoff_fn(cg, seed=round_seed)
+        if accepts_out:
+            rule_kwargs["out"] = spare
+        new_strategy = update_rule(cg, payoffs, np.random.default_rng(round_seed), **rule_kwargs)
+
+        # A rule that returned its own array instead of filling spare: check it covers all nodes, then copy it in
+        if new_strategy is not spare:
+            if new_strategy.shape != cg.strategy.shape:
+                raise ValueError(f"Update rule returned {new_strategy.size} strategies for {cg.strategy.size} nodes")
+            spare[:] = new_strategy
+        cg.strategy, spare = spare, cg.strategy
+        history[i + 1] = np.packbits(cg.strategy)
+
+    # Hand the caller's buffer back, holding the final strategies
+    if cg.strategy is not original:
+        original[:] = cg.strategy
+        cg.strategy = original
+    return history
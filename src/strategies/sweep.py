@@ -0,0 +1,90 @@
+'''
+Module for running many independent replicas (seeds) of one simulation configuration in parallel.
+Every replica re-initializes the strategies from its own seed and runs a full synchronous
+simulation, so the replicas share nothing but the (read-only) topology and are farmed out to
+worker processes. Each worker receives the compiled graph once, not once per replica.
+'''
+from concurrent.futures import ProcessPoolExecutor
+from typing import Sequence
+import numpy as np
+
+from utils.graph_csr import CompiledGraph
+from src.strategies.initial_state import coin_flip_initializer, assign_strategies, Initializer
+from src.strategies.update_rule import UpdateRule
+from src.strategies.simulator import run_sync, count_cooperators, PayoffFunction
+
+# The worker's private copy of the compiled graph, set once per worker process by _init_worker
+_worker_cg = None
+
+
+def _init_worker(cg: CompiledGraph) -> None:
+    """
+    Stores the compiled graph in the worker process.
+    """
+    global _worker_cg
+    _worker_cg = cg
+
+
+def _run_replica(
+    num_iterations: int,
+    payoff_fn: PayoffFunction,
+    update_rule: UpdateRule,
+    initializer: Initializer,
+    p: float,
+    seed: int,
+    backend: str
+) -> np.ndarray:
+    """
+    Runs one replica on the worker's graph and returns its fraction of cooperators after every round.
+    """
+    assign_strategies(_worker_cg, initializer, p=p, seed=seed)
+    history = run_sync(_worker_cg, num_iterations, payoff_fn, update_rule, seed=seed, backend=backend)
+    return count_cooperators(history) / _worker_cg.strategy.size
+
+
+def sweep(
+    cg: CompiledGraph,
+    num_iterations: int,
+    payoff_fn: PayoffFunction,
+    update_rule: UpdateRule,
+    seeds: Sequence[int],
+    p: float = 0.5,
+    initializer: Initializer = coin_flip_initializer,
+    backend: str = None,
+    max_workers: int = None
+) -> np.ndarray:
+    """
+    Run one replica of the simulation per seed, in parallel worker processes. Replica i is
+    initialized and played exactly like run_config with seed seeds[i] (round t seeded with
+    seeds[i] + t), so the result does not depend on the number of workers. cg is not modified.
+
+    Args:
+        cg (CompiledGraph) : The compiled graph of the dataset.
+        num_iterations (int) : Number of rounds every replica plays.
+        payoff_fn (PayoffFunction) : The game, e.g. play_prisoners_dilemma.
+        update_rule (UpdateRule) : The strategy update rule.
+        seeds (Sequence[int]) : Seed of every replica.
+        p (float) : Initial probability of cooperating (default: 0.5).
+        initializer (Initializer) : Initial strategy assignment (default: coin_flip_initializer).
+        backend (str) : Backend of the update rule, "numba", "cython", "numpy" or "cuda", passed on
+                        to the rule if given (default: None, the rule's own default).
+        max_workers (int) : Number of worker processes (default: os.cpu_count()).
+
+    Returns:
+        np.ndarray : Array of shape (len(seeds), num_iterations + 1) with the fraction of
+                     cooperators of every replica after every round (column 0 is the initial state).
+    """
+    coop_frac = np.empty((len(seeds), num_iterations + 1))
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(cg,)) as executor:
+        futures = [
+            executor.submit(_run_replica, num_iterations, payoff_fn, update_rule, initializer, p, seed, backend)
+            for seed in seeds
+        ]
+        for i, future in enumerate(futures):
+            coop_frac[i] = future.result()
+    return coop_frac
+
+# Example usage
+# cg = load_graph('data/facebook_combined.txt', directed=False, cache_path='data/facebook.npz')
+# coop_frac = sweep(cg, 20, play_prisoners_dilemma, imitate_best_neighbor, seeds=range(100))
+# print("Mean final fraction of cooperators:", coop_frac[:, -1].mean())
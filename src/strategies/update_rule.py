@@ -6,80 +6,147 @@ Provides an abstraction for applying different update rules with the following s
     - Fermi update
     - All-neighbors trust-aware update
 '''
-from typing import Callable, Dict
-import networkx as nx
+from typing import Callable
 import numpy as np
 
+from utils.graph_csr import CompiledGraph
+from utils.jit import NUMBA_AVAILABLE
+from utils.gpu import CUPY_AVAILABLE, cp
+from src.strategies._kernels import imitate_best_kernel, trust_aware_kernel, fermi_kernel, all_neighbors_trust_kernel
+from src.strategies._vectorized import imitate_best_vectorized, trust_aware_vectorized, fermi_vectorized, all_neighbors_trust_vectorized
+
+# The Cython kernels only exist once src/strategies/_ckernels.pyx has been compiled
+try:
+    from src.strategies import _ckernels
+    CYTHON_AVAILABLE = True
+except ImportError:
+    _ckernels = None
+    CYTHON_AVAILABLE = False
+
 # Type aliases for clarity
 Strategy = int  # 1 = Cooperate, 0 = Defect
-PayoffMap = Dict[int, float]  # node ID -> accumulated payoff
-UpdateRule = Callable[[nx.Graph, PayoffMap, np.random.Generator], Dict[int, Strategy]] # Function type for update rules
+PayoffArray = np.ndarray  # node index -> accumulated payoff
+UpdateRule = Callable[[CompiledGraph, PayoffArray, np.random.Generator], np.ndarray] # Function type for update rules
+
+# How the update rules run: "numba" (compiled kernels), "cython" (the same kernels compiled ahead
+# of time, needs the built _ckernels extension), "numpy" (whole-array operations) or "cuda" (the
+# whole-array operations on CuPy arrays, needs cupy). All give the same results.
+BACKENDS = ("numba", "cython", "numpy", "cuda")
+DEFAULT_BACKEND = "numba" if NUMBA_AVAILABLE else "cython" if CYTHON_AVAILABLE else "numpy"
+
+def _resolve_backend(backend: str = None) -> str:
+    """
+    Returns the backend to run an update rule on (DEFAULT_BACKEND if backend is None).
+
+    Raises:
+        ValueError: If the backend is unknown, or its extension (numba, cupy, _ckernels) is not available.
+    """
+    backend = DEFAULT_BACKEND if backend is None else backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    if backend == "numba" and not NUMBA_AVAILABLE:
+        raise ValueError("The 'numba' backend needs numba, which is not installed")
+    if backend == "cython" and not CYTHON_AVAILABLE:
+        raise ValueError("The 'cython' backend needs the compiled extension: cythonize -i src/strategies/_ckernels.pyx")
+    if backend == "cuda" and not CUPY_AVAILABLE:
+        raise ValueError("The 'cuda' backend needs cupy, which is not installed")
+    return backend
+
+def _run_kernel(backend: str, kernel: Callable, vectorized: Callable, *args) -> None:
+    """
+    Runs an update rule on the given backend: its numba kernel, the Cython kernel of the same
+    name, or its whole-array version on NumPy or CuPy arrays. The last argument is the output
+    buffer, written in place.
+    """
+    backend = _resolve_backend(backend)
+    if backend == "numba":
+        kernel(*args)
+    elif backend == "cython":
+        getattr(_ckernels, kernel.__name__)(*args)
+    elif backend == "numpy":
+        vectorized(*args)
+    else:
+        # The inputs, pre-drawn random numbers included, are copied to the GPU and the new strategies back
+        *inputs, out = args
+        device_out = cp.empty(out.shape, dtype=out.dtype)
+        vectorized(*(cp.asarray(a) if isinstance(a, np.ndarray) else a for a in inputs), device_out)
+        out[:] = device_out.get()
 
 def update_strategies(
-    G: nx.Graph,
-    payoffs: PayoffMap,
+    cg: CompiledGraph,
+    payoffs: PayoffArray,
     update_rule: UpdateRule,
-    seed: int = None
+    seed: int = None,
+    backend: str = None
 ) -> None:
     """
-    Update each node's 'strategy' attribute in-place using the given update rule.
+    Update each node's strategy in cg.strategy using the given update rule.
 
     Args:
-        G (nx.Graph) : Graph with node attribute 'strategy' and precomputed payoffs.
-        payoffs (Dict[int, float]) : Mapping from node ID to its accumulated payoff.
+        cg (CompiledGraph) : Compiled graph holding the current strategies.
+        payoffs (np.ndarray) : Accumulated payoff of each node, indexed by compact node index.
         update_rule (UpdateRule) : Function implementing the strategy-update logic.
         seed (int) : Seed for random decisions within the update rule.
+        backend (str) : "numba", "cython", "numpy" or "cuda", passed on to the update rule if given
+                        (default: None, the rule's own default).
 
     Raises:
         ValueError: If the update rule fails to return a new strategy for every node.
     """
     rng = np.random.default_rng(seed)
-    new_strategy_map = update_rule(G, payoffs, rng)
+    if backend is None:
+        new_strategy = update_rule(cg, payoffs, rng)
+    else:
+        new_strategy = update_rule(cg, payoffs, rng, backend=backend)
 
     # Ensure the rule covers all nodes
-    missing = set(G.nodes()) - set(new_strategy_map.keys())
-    if missing:
-        raise ValueError(f"Update rule did not provide strategies for nodes: {missing}")
+    if new_strategy.shape != cg.strategy.shape:
+        raise ValueError(f"Update rule returned {new_strategy.size} strategies for {cg.strategy.size} nodes")
 
-    # Apply the updated strategies
-    nx.set_node_attributes(G, new_strategy_map, "strategy")
+    # Apply the updated strategies: a contiguous copy into the existing int8 buffer
+    cg.strategy[:] = new_strategy
+
+def _coin_flips(rng: np.random.Generator, n: int) -> np.ndarray:
+    """
+    Returns n fair 0/1 coins as a uint8 array, unpacked from n/8 random bytes instead of
+    drawing one float per coin.
+    """
+    return np.unpackbits(np.frombuffer(rng.bytes((n + 7) // 8), dtype=np.uint8), count=n)
 
 def imitate_best_neighbor(
-    G: nx.Graph,
-    payoffs: PayoffMap,
-    rng: np.random.Generator
-) -> Dict[int, Strategy]:
+    cg: CompiledGraph,
+    payoffs: PayoffArray,
+    rng: np.random.Generator,
+    backend: str = None,
+    out: np.ndarray = None
+) -> np.ndarray:
     """
     Imitate-best-neighbor rule: each agent adopts the strategy of the neighbor (or itself)
     with the highest payoff. In case of ties, randomly select among the top performers.
 
     Args:
-        G (nx.Graph) : The graph with strategy and payoff information.
-        payoffs (Dict[int, float]) : Mapping of node ID to total payoff.
+        cg (CompiledGraph) : The compiled graph with strategy information.
+        payoffs (np.ndarray) : Total payoff of each node.
         rng (np.random.Generator) : Random generator for tie-breaking.
+        backend (str) : "numba", "cython", "numpy" or "cuda" (default: DEFAULT_BACKEND).
+        out (np.ndarray) : Buffer to write the new strategies into, other than cg.strategy (default: a new array).
 
     Returns:
-        Dict[int, Strategy] : Mapping from node ID to new strategy.
-    """
-    new_strat: Dict[int, Strategy] = {}
-    for u in G.nodes():
-        best = u
-        best_pay = payoffs[u]
-        for v in G.neighbors(u):
-            p = payoffs[v]
-            if p > best_pay:
-                best = v
-                best_pay = p
-            elif p == best_pay and rng.random() < 0.5:
-                best = v
-        new_strat[u] = G.nodes[best]["strategy"]
+        np.ndarray : New strategy of each node.
+    """
+    new_strat = np.empty_like(cg.strategy) if out is None else out
+    tie_coins = _coin_flips(rng, cg.indices.size)  # One coin per CSR entry, used if that neighbor ties the best
+    _run_kernel(backend, imitate_best_kernel, imitate_best_vectorized,
+                cg.indptr, cg.indices, cg.strategy, payoffs, tie_coins, new_strat)
     return new_strat
 
 def trust_aware_update(
-    G: nx.Graph,               # works for DiGraph or Graph
-    payoffs: PayoffMap,
-    rng: np.random.Generator
-) -> Dict[int, Strategy]:
+    cg: CompiledGraph,         # works for DiGraph or Graph
+    payoffs: PayoffArray,
+    rng: np.random.Generator,
+    backend: str = None,
+    out: np.ndarray = None
+) -> np.ndarray:
     """
     Strategy update that respects signed trust edges.
 
@@ -94,39 +161,23 @@ def trust_aware_update(
            • a trusted neighbour (sign = +1) .... adopt v*'s strategy
            • a distrusted neighbour (sign = -1) . adopt the *opposite*
                                                   of v*'s strategy
-    """
-    new_strat: Dict[int, Strategy] = {}
-
-    for u in G.nodes():
-        # build candidate list: (node, sign)
-        candidates = [(u, +1)]
-        for v in G[u]:              # <- works for Graph and DiGraph
-            s = G[u][v].get("sign", +1)
-            candidates.append((v, s))
-
-        # compute effective payoffs
-        eff = [s * payoffs[v] for v, s in candidates]
-        max_eff = max(eff)
-
-        # tie‐break uniformly
-        best_idxs = [i for i, val in enumerate(eff) if val == max_eff]
-        idx = rng.choice(best_idxs)
-        v_star, sign_uv = candidates[idx]
-
-        # assign new strategy
-        if v_star == u:
-            new_strat[u] = G.nodes[u]["strategy"]
-        else:
-            neigh_s = G.nodes[v_star]["strategy"]
-            new_strat[u] = neigh_s if sign_uv == +1 else 1 - neigh_s
 
+    backend selects "numba", "cython", "numpy" or "cuda" (default: DEFAULT_BACKEND), and the new
+    strategies are written into out if given (a buffer other than cg.strategy).
+    """
+    new_strat = np.empty_like(cg.strategy) if out is None else out
+    tie_u01 = rng.random(cg.strategy.size)  # Uniform pick among each node's best candidates
+    _run_kernel(backend, trust_aware_kernel, trust_aware_vectorized,
+                cg.indptr, cg.indices, cg.signs, cg.strategy, payoffs, tie_u01, new_strat)
     return new_strat
 
 def fermi_update(
-    G: nx.Graph,
-    payoffs: PayoffMap,
-    rng: np.random.Generator
-) -> Dict[int, Strategy]:
+    cg: CompiledGraph,
+    payoffs: PayoffArray,
+    rng: np.random.Generator,
+    backend: str = None,
+    out: np.ndarray = None
+) -> np.ndarray:
     """
     Fermi update rule: each agent u selects one random neighbor v and adopts v's strategy
     with probability given by the Fermi function
@@ -134,52 +185,31 @@ def fermi_update(
     where K > 0 is the "temperature" (noise) parameter. If u has no neighbors, it keeps its strategy.
 
     Args:
-        G (nx.Graph) : The graph with strategy and payoff information.
-        payoffs (Dict[int, float]) : Mapping of node ID to total payoff.
+        cg (CompiledGraph) : The compiled graph with strategy information.
+        payoffs (np.ndarray) : Total payoff of each node.
         rng (np.random.Generator) : Random generator for neighbor selection and probabilistic decision.
+        backend (str) : "numba", "cython", "numpy" or "cuda" (default: DEFAULT_BACKEND).
+        out (np.ndarray) : Buffer to write the new strategies into, other than cg.strategy (default: a new array).
 
     Returns:
-        Dict[int, Strategy] : Mapping from node ID to new strategy.
+        np.ndarray : New strategy of each node.
     """
-    new_strat: Dict[int, Strategy] = {}
+    new_strat = np.empty_like(cg.strategy) if out is None else out
     K = 0.1  # Fermi noise parameter; adjust as needed
 
-    for u in G.nodes():
-        neighbors = list(G.neighbors(u))
-        if not neighbors:
-            # No neighbors: keep current strategy
-            new_strat[u] = G.nodes[u]["strategy"]
-            continue
-
-        # Select a random neighbor v
-        v = rng.choice(neighbors)
-        payoff_u = payoffs[u]
-        payoff_v = payoffs[v]
-
-        # Compute adoption probability
-        x = (payoff_v - payoff_u) / K
-        # Numerically stable logistic
-        if x >= 0:
-            z = np.exp(-x)
-            prob = 1.0 / (1.0 + z)
-        else:
-            z = np.exp(x)
-            prob = z / (1.0 + z)
-
-
-        # Decide whether to adopt v's strategy
-        if rng.random() < prob:
-            new_strat[u] = G.nodes[v]["strategy"]
-        else:
-            new_strat[u] = G.nodes[u]["strategy"]
-
+    # Random neighbor and adoption coin of every node, drawn in one call
+    pick_u01, accept_u01 = rng.random((2, cg.strategy.size))
+    _run_kernel(backend, fermi_kernel, fermi_vectorized,
+                cg.indptr, cg.indices, cg.strategy, payoffs, pick_u01, accept_u01, K, new_strat)
     return new_strat
 
 def all_neighbors_trust_aware_update(
-    G: nx.Graph,               # works for DiGraph or Graph
-    payoffs: PayoffMap,
-    rng: np.random.Generator
-) -> Dict[int, Strategy]:
+    cg: CompiledGraph,         # works for DiGraph or Graph
+    payoffs: PayoffArray,
+    rng: np.random.Generator,
+    backend: str = None,
+    out: np.ndarray = None
+) -> np.ndarray:
     """
     Strategy update that considers all neighbors' payoffs weighted by trust relationships.
     
@@ -191,36 +221,23 @@ def all_neighbors_trust_aware_update(
     4. If exactly zero, maintain current strategy with 50% probability or flip it
     
     Args:
-        G (nx.Graph): The graph with strategy information and signed edges
-        payoffs (Dict[int, float]): Mapping of node ID to total payoff
+        cg (CompiledGraph): The compiled graph with strategy information and signed edges
+        payoffs (np.ndarray): Total payoff of each node
         rng (np.random.Generator): Random generator for tie-breaking
+        backend (str): "numba", "cython", "numpy" or "cuda" (default: DEFAULT_BACKEND)
+        out (np.ndarray): Buffer to write the new strategies into, other than cg.strategy (default: a new array)
         
     Returns:
-        Dict[int, Strategy]: Mapping from node ID to new strategy
+        np.ndarray: New strategy of each node
     """
-    new_strat = {}
-    
-    for u in G.nodes():
-        # Start with node's own contribution
-        weighted_payoff_sum = payoffs[u]
-        
-        # Add weighted payoffs from all neighbors
-        for v in G[u]:
-            sign = G[u][v].get("sign", +1)  # Default to trust if sign not specified
-            weighted_payoff_sum += sign * payoffs[v]
-        
-        # Determine strategy based on weighted sum
-        if weighted_payoff_sum > 0:
-            new_strat[u] = 1  # Cooperate
-        elif weighted_payoff_sum < 0:
-            new_strat[u] = 0  # Defect
-        else:  # weighted_payoff_sum == 0
-            # Tie-breaking: keep current with 50% probability or flip it
-            current_strat = G.nodes[u]["strategy"] 
-            new_strat[u] = current_strat if rng.random() < 0.5 else 1 - current_strat
-    
+    new_strat = np.empty_like(cg.strategy) if out is None else out
+    keep_coins = _coin_flips(rng, cg.strategy.size)  # Keep-or-flip coin, used only on a zero sum
+    _run_kernel(backend, all_neighbors_trust_kernel, all_neighbors_trust_vectorized,
+                cg.indptr, cg.indices, cg.signs, cg.strategy, payoffs, keep_coins, new_strat)
     return new_strat
 # Example usage
 # G = nx.read_edgelist('facebook_combined.txt', nodetype=int)
-# payoffs = {node: np.random.random() for node in G.nodes()}  # Dummy payoffs. Should be received from game logic.
-# update_strategies(G, payoffs, imitate_best_neighbor, seed=42)
+# cg = to_csr(G)
+# assign_strategies(cg, coin_flip_initializer, seed=42)
+# payoffs = np.random.random(cg.strategy.size)  # Dummy payoffs. Should be received from game logic.
+# update_strategies(cg, payoffs, imitate_best_neighbor, seed=42)
@@ -0,0 +1,30 @@
+'''
+Optional CuPy support for the vectorized update rules.
+If cupy is installed, the functions in _vectorized.py also run on CuPy arrays (on the GPU), and
+get_array_module picks numpy or cupy from the arrays they are given; otherwise everything stays NumPy.
+'''
+import numpy as np
+import scipy.sparse
+
+try:
+    import cupy as cp
+    import cupyx.scipy.sparse as cupy_sparse
+    CUPY_AVAILABLE = True
+except ImportError:
+    cp = None
+    cupy_sparse = None
+    CUPY_AVAILABLE = False
+
+
+def get_array_module(*arrays):
+    """
+    Returns the array module (numpy or cupy) the given arrays belong to.
+    """
+    return cp.get_array_module(*arrays) if CUPY_AVAILABLE else np
+
+
+def get_sparse_module(xp):
+    """
+    Returns the sparse matrix module matching the array module xp (scipy.sparse or cupyx.scipy.sparse).
+    """
+    return scipy.sparse if xp is np else cupy_sparse
@@ -0,0 +1,270 @@
+'''
+Module for compiling a NetworkX graph into flat NumPy arrays for the simulation hot loops.
+The topology is stored once in CSR (indptr/indices) form together with the edge lists the
+games are played on, and the node state lives in contiguous structure-of-arrays buffers
+instead of per-node attribute dicts.
+'''
+from dataclasses import dataclass
+import networkx as nx
+import numpy as np
+
+
+@dataclass
+class CompiledGraph:
+    """
+    Structure-of-arrays representation of a (directed or undirected) graph.
+
+    Node i of every array corresponds to the original node ID nodes[i]. Nodes are indexed in
+    sorted ID order, so u < v on indices is the same as u < v on the original node IDs; order
+    keeps the order the nodes were originally listed in (G.nodes(), or first appearance in the
+    edge list), which the seeded initial strategies and the order of the game pairs follow.
+
+    Attributes:
+        nodes (np.ndarray) : Original node IDs, indexed by compact node index.
+        order (np.ndarray) : Compact index of every node in original node order.
+        indptr (np.ndarray) : CSR row pointer; the neighbors of u are indices[indptr[u]:indptr[u+1]].
+        indices (np.ndarray) : CSR column indices (out-neighbors on a DiGraph).
+        signs (np.ndarray) : Trust sign of every CSR entry (+1 trust, -1 distrust, +1 if unsigned).
+        edges_u (np.ndarray) : First endpoint of every game pair (u, v) with u < v, in original node order of u.
+        edges_v (np.ndarray) : Second endpoint of every game pair.
+        sign_uv (np.ndarray) : Sign of the edge u->v of every game pair (0 if unsigned).
+        sign_vu (np.ndarray) : Sign of the reverse edge v->u (0 if missing or unsigned).
+        strategy (np.ndarray) : Current strategy of every node (1 = Cooperate, 0 = Defect).
+        directed (bool) : Whether the compiled graph was directed.
+        signed (bool) : Whether the edges carried a 'sign' attribute.
+    """
+    nodes: np.ndarray
+    order: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+    signs: np.ndarray
+    edges_u: np.ndarray
+    edges_v: np.ndarray
+    sign_uv: np.ndarray
+    sign_vu: np.ndarray
+    strategy: np.ndarray
+    directed: bool = False
+    signed: bool = False
+
+
+def _game_pairs(indptr: np.ndarray, indices: np.ndarray, node_order: np.ndarray, signs: np.ndarray = None) -> tuple:
+    """
+    Select the game pairs from the upper triangle of a CSR adjacency: every pair is only played
+    once (u < v), along with the trust signs of both directions. The pairs come row by row in
+    original node order, each row in CSR order, like the G.nodes() / G.neighbors(u) loop they
+    replace; the trust game applies its flips in this order.
+
+    Args:
+        indptr (np.ndarray) : CSR row pointer.
+        indices (np.ndarray) : CSR column indices.
+        node_order (np.ndarray) : Compact index of every node in original node order.
+        signs (np.ndarray) : Optional sign of every CSR entry (0 if the entry is unsigned).
+
+    Returns:
+        tuple : (edges_u, edges_v, sign_uv, sign_vu), the last two all 0 if signs is None.
+    """
+    N = indptr.size - 1
+    rows = np.repeat(np.arange(N, dtype=np.int32), np.diff(indptr))
+    upper = indices > rows
+    edges_u, edges_v = rows[upper], indices[upper]
+
+    sign_uv = np.zeros(edges_u.size, dtype=np.int8)
+    sign_vu = np.zeros(edges_u.size, dtype=np.int8)
+    if signs is not None and edges_u.size:
+        sign_uv[:] = signs[upper]
+        # Look up the reverse entry v->u of every pair among the sorted u*N+v keys
+        keys = rows.astype(np.int64) * N + indices
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        reverse = edges_v.astype(np.int64) * N + edges_u
+        pos = np.minimum(np.searchsorted(keys, reverse), keys.size - 1)
+        found = keys[pos] == reverse
+        sign_vu[found] = signs[order[pos[found]]]
+
+    # Rows in original node order; the stable sort keeps every row's pairs in CSR order
+    rank = np.empty(N, dtype=np.intp)
+    rank[node_order] = np.arange(N)
+    by_rank = np.argsort(rank[edges_u], kind="stable")
+    return edges_u[by_rank], edges_v[by_rank], sign_uv[by_rank], sign_vu[by_rank]
+
+
+def to_csr(G: nx.Graph) -> CompiledGraph:
+    """
+    Compile a NetworkX graph into a CompiledGraph. Every node starts out as a defector (0);
+    use assign_strategies to initialize the strategy array.
+
+    Args:
+        G (nx.Graph) : The graph to compile (Graph or DiGraph, optionally with a 'sign' edge attribute).
+
+    Returns:
+        CompiledGraph : The array representation of G.
+    """
+    nodes = sorted(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    adj = G._adj  # The underlying dict of dicts; G.adj / G[u] wrap every access in an AtlasView
+
+    # CSR adjacency in a single pass over the neighbor dicts, fetching each edge's data with it;
+    # entries without a 'sign' attribute get 0 here and +1 in cg.signs
+    counts, neighbors, edge_signs = [], [], []
+    signed = False
+    for u in nodes:
+        nbrs = adj[u]
+        counts.append(len(nbrs))
+        for v, d in nbrs.items():
+            neighbors.append(index[v])
+            edge_signs.append(d.get("sign", 0))
+            signed |= "sign" in d
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int32)
+    np.cumsum(counts, out=indptr[1:])
+    indices = np.array(neighbors, dtype=np.int32)
+    raw_signs = np.array(edge_signs, dtype=np.int8)
+    signs = np.where(raw_signs != 0, raw_signs, 1).astype(np.int8)
+    node_order = np.array([index[node] for node in G], dtype=np.int32)
+
+    edges_u, edges_v, sign_uv, sign_vu = _game_pairs(indptr, indices, node_order, raw_signs if signed else None)
+
+    return CompiledGraph(
+        nodes=np.asarray(nodes),
+        order=node_order,
+        indptr=indptr,
+        indices=indices,
+        signs=signs,
+        edges_u=edges_u,
+        edges_v=edges_v,
+        sign_uv=sign_uv,
+        sign_vu=sign_vu,
+        strategy=np.zeros(len(nodes), dtype=np.int8),
+        directed=G.is_directed(),
+        signed=signed,
+    )
+
+
+def from_edges(
+    src: np.ndarray,
+    dst: np.ndarray,
+    signs: np.ndarray = None,
+    directed: bool = False
+) -> CompiledGraph:
+    """
+    Compile an edge list given as NumPy arrays into a CompiledGraph without building a NetworkX graph.
+    Duplicate edges collapse into one, keeping the sign of the last occurrence (like repeated
+    G.add_edge calls), and undirected edges are stored in both directions. The result is the same
+    as to_csr on the NetworkX graph built from the same edge list, neighbor order included.
+
+    Args:
+        src (np.ndarray) : Source node ID of every edge.
+        dst (np.ndarray) : Target node ID of every edge.
+        signs (np.ndarray) : Optional trust sign (+1 / -1) of every edge.
+        directed (bool) : Whether the edges are directed (default: False).
+
+    Returns:
+        CompiledGraph : The array representation of the graph, with every node a defector (0).
+    """
+    signed = signs is not None
+    signs = np.ones(len(src), dtype=np.int8) if signs is None else np.asarray(signs, dtype=np.int8)
+
+    # Node IDs in the order add_edge would add them: src then dst of every edge in turn
+    nodes, first_seen = np.unique(np.stack((src, dst), axis=1).ravel(), return_index=True)
+    node_order = np.argsort(first_seen).astype(np.int32)
+    N = nodes.size
+    u = np.searchsorted(nodes, src)
+    v = np.searchsorted(nodes, dst)
+    if not directed:
+        # Interleave both directions so the occurrences stay in input order
+        u, v = np.stack((u, v), axis=1).ravel(), np.stack((v, u), axis=1).ravel()
+        signs = np.repeat(signs, 2)
+
+    # One entry per (u, v), with the sign of its last occurrence (like repeated G.add_edge calls)
+    keys = u * N + v
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    start = np.ones(keys.size, dtype=bool)
+    start[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    end = np.ones(keys.size, dtype=bool)
+    end[:-1] = start[1:]
+    first, last = order[start], order[end]
+
+    # Rows in node order, each listing its neighbors in order of first occurrence like G.adj does
+    entry_order = np.lexsort((first, u[first]))
+    row, col, signs = u[first][entry_order], v[first][entry_order], signs[last][entry_order]
+
+    # CSR adjacency
+    indptr = np.zeros(N + 1, dtype=np.int32)
+    np.cumsum(np.bincount(row, minlength=N), out=indptr[1:])
+    indices = col.astype(np.int32)
+
+    edges_u, edges_v, sign_uv, sign_vu = _game_pairs(indptr, indices, node_order, signs if signed else None)
+
+    return CompiledGraph(
+        nodes=nodes,
+        order=node_order,
+        indptr=indptr,
+        indices=indices,
+        signs=signs,
+        edges_u=edges_u,
+        edges_v=edges_v,
+        sign_uv=sign_uv,
+        sign_vu=sign_vu,
+        strategy=np.zeros(N, dtype=np.int8),
+        directed=directed,
+        signed=signed,
+    )
+
+
+def node_index(cg: CompiledGraph, node_ids) -> np.ndarray:
+    """
+    Map original node IDs to their compact node indices in cg (the node_to_idx lookup), e.g. to
+    read cg.strategy or the neighbors indices[indptr[i]:indptr[i+1]] of a given node.
+
+    Args:
+        cg (CompiledGraph) : The compiled graph.
+        node_ids : A single node ID or an array of node IDs.
+
+    Raises:
+        KeyError: If any of the node IDs is not in cg.
+
+    Returns:
+        np.ndarray : The compact index of every node ID.
+    """
+    node_ids = np.asarray(node_ids)
+    idx = np.minimum(np.searchsorted(cg.nodes, node_ids), max(cg.nodes.size - 1, 0))
+    if cg.nodes.size == 0 or np.any(cg.nodes[idx] != node_ids):
+        raise KeyError(f"Node(s) not in the compiled graph: {np.setdiff1d(node_ids, cg.nodes)}")
+    return idx
+
+
+def to_networkx(cg: CompiledGraph, with_signs: bool = True, strategy: np.ndarray = None) -> nx.Graph:
+    """
+    Rebuild a NetworkX graph from a CompiledGraph, with the current strategies as the 'strategy'
+    node attribute (and the trust signs as the 'sign' edge attribute if the graph is signed),
+    e.g. to export a snapshot with nx.write_gexf.
+
+    Args:
+        cg (CompiledGraph) : The compiled graph holding the current strategies.
+        with_signs (bool) : Whether to keep the 'sign' edge attribute; pass False for a minimal
+                            graph carrying only the node strategies (default: True).
+        strategy (np.ndarray) : Strategies to export instead of cg.strategy, e.g. a row of a
+                                recorded strategy history (default: None).
+
+    Returns:
+        nx.Graph : A Graph or DiGraph with the same nodes and edges as cg.
+    """
+    G = nx.DiGraph() if cg.directed else nx.Graph()
+    nodes = cg.nodes.tolist()
+    strategy = cg.strategy if strategy is None else strategy
+    # Added in original node order, so that to_csr on the result gives back the same order
+    G.add_nodes_from(zip(cg.nodes[cg.order].tolist(), ({"strategy": s} for s in strategy[cg.order].tolist())))
+
+    rows = np.repeat(np.arange(len(nodes)), np.diff(cg.indptr))
+    if not cg.directed:
+        # Each undirected edge is stored in both directions; add it once
+        upper = cg.indices >= rows
+        rows, cols, signs = rows[upper], cg.indices[upper], cg.signs[upper]
+    else:
+        cols, signs = cg.indices, cg.signs
+    src, dst = cg.nodes[rows].tolist(), cg.nodes[cols].tolist()
+    if cg.signed and with_signs:
+        G.add_edges_from(zip(src, dst, ({"sign": s} for s in signs.tolist())))
+    else:
+        G.add_edges_from(zip(src, dst))
+    return G
@@ -0,0 +1,18 @@
+'''
+Optional Numba support for the simulation kernels.
+If numba is installed, njit is numba.njit; otherwise it falls back to a no-op decorator,
+so the kernels still run as plain Python (much slower, but with identical results).
+'''
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """
+        No-op stand-in for numba.njit, usable both as @njit and as @njit(cache=True).
+        """
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
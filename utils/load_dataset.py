@@ -1,4 +1,5 @@
 import networkx as nx
+import numpy as np
 
 def load_epinions(path, directed=True):
     """
@@ -6,17 +7,13 @@ def load_epinions(path, directed=True):
     Each edge gets a 'sign' attribute of +1 (trust) or -1 (distrust).
     """
     G = nx.DiGraph() if directed else nx.Graph()
-    with open(path, 'r') as f:
-        for line in f:
-            # skip comment or header lines
-            if line.startswith('#') or line.strip() == "":
-                continue
-            src, dst, sign = line.split()
-            src, dst, sign = int(src), int(dst), int(sign)
-            if directed:
-                G.add_edge(src, dst, sign=sign)
-            else:
-                G.add_edge(src, dst) # Not saving sign for undirected graph
+    # Parse the whole edge list in C ('#' lines are comments) instead of splitting every line in Python
+    edges = np.loadtxt(path, dtype=np.int64, comments='#', ndmin=2)
+    src, dst, sign = edges[:, 0].tolist(), edges[:, 1].tolist(), edges[:, 2].tolist()
+    if directed:
+        G.add_weighted_edges_from(zip(src, dst, sign), weight='sign')
+    else:
+        G.add_edges_from(zip(src, dst)) # Not saving sign for undirected graph
     return G
 
 # Example usage: